@@ -10,6 +10,11 @@ import json
 import numbers
 import operator
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 JsonDecoder = json.JSONDecoder
 
@@ -31,6 +36,53 @@ class JsonEncoder(json.JSONEncoder):
         return super().default(value)
 
 
+class FastJsonDecoder(object):
+    """A faster alternative to JsonDecoder for parsing large volumes of JSON.
+
+    Uses orjson if it is installed, and the standard library decoder otherwise. In
+    both cases, all JSON objects are decoded as plain dicts; to avoid the overhead
+    of invoking Python code for every object, object_hook and object_pairs_hook are
+    not supported.
+    """
+
+    supports_object_hook = False
+
+    def decode(self, s):
+        if orjson is not None:
+            try:
+                return orjson.loads(s)
+            except orjson.JSONDecodeError:
+                # orjson is stricter than the standard library - e.g. it rejects
+                # integers that don't fit into 64 bits - so let the latter decide.
+                pass
+        return json.loads(s)
+
+
+class FastJsonEncoder(JsonEncoder):
+    """A faster alternative to JsonEncoder for serializing large volumes of JSON.
+
+    If orjson is installed, and no formatting options were specified, it is used
+    to produce compact JSON, and encode() returns UTF-8 bytes rather than str.
+    Otherwise, the standard library encoder is used.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._use_orjson = orjson is not None and not kwargs
+
+    def encode(self, value):
+        if self._use_orjson:
+            try:
+                return orjson.dumps(
+                    value, default=self.default, option=orjson.OPT_NON_STR_KEYS
+                )
+            except orjson.JSONEncodeError:
+                # Some values, such as integers that don't fit into 64 bits, are only
+                # supported by the standard library encoder.
+                pass
+        return super().encode(value)
+
+
 class JsonObject(object):
     """A wrapped Python object that formats itself as JSON when asked for a string
     representation via str() or format().
@@ -19,6 +19,7 @@ import os
 import socket
 import sys
 import threading
+import time
 
 from debugpy.common import json, log, util
 from debugpy.common.util import hide_thread_from_debugger
@@ -65,6 +66,36 @@ class JsonIOStream(object):
 
     MAX_BODY_SIZE = 0xFFFFFF
 
+    READ_BUFFER_SIZE = 0x10000
+    """Initial size of the read buffer used by read_json() when buffered_reads=True.
+
+    The buffer grows as needed to hold the largest message read so far.
+    """
+
+    buffered_reads = False
+    """Default for the buffered_reads argument of __init__().
+
+    If True, read_json() reads raw data in bulk into a single reusable bytearray,
+    parses the headers in place, and decodes the body directly from a slice of that
+    buffer; otherwise, it reads headers line by line and the body in chunks, which
+    are then joined.
+    """
+
+    coalesce_writes = False
+    """Default for the coalesce_writes argument of __init__().
+
+    If True, write_json() enqueues encoded messages instead of writing them right
+    away. Enqueued messages are written in order, in batches - using a single vectored
+    write if writer has a file descriptor - either as soon as WRITE_COALESCE_SIZE bytes
+    are pending, or WRITE_COALESCE_DELAY seconds after a message is first enqueued.
+    """
+
+    WRITE_COALESCE_DELAY = 0.002
+    WRITE_COALESCE_SIZE = 0x10000
+
+    _IOV_MAX = 1024
+    """Max number of buffers passed to a single os.writev() call."""
+
     json_decoder_factory = json.JsonDecoder
     """Used by read_json() when decoder is None."""
 
@@ -108,7 +139,15 @@ class JsonIOStream(object):
 
         return cls(socket_io, socket_io, name, cleanup)
 
-    def __init__(self, reader, writer, name=None, cleanup=lambda: None):
+    def __init__(
+        self,
+        reader,
+        writer,
+        name=None,
+        cleanup=lambda: None,
+        buffered_reads=None,
+        coalesce_writes=None,
+    ):
         """Creates a new JsonIOStream.
 
         reader must be a BytesIO-like object, from which incoming messages will be
@@ -122,10 +161,20 @@ class JsonIOStream(object):
 
         reader.readline() must treat "\n" as the line terminator, and must leave "\r"
         as is - it must not replace "\r\n" with "\n" automatically, as TextIO does.
+
+        If buffered_reads is None, JsonIOStream.buffered_reads is used. If it is True,
+        reader must also implement readinto1() or readinto(), returning as soon as
+        some data is available.
+
+        If coalesce_writes is None, JsonIOStream.coalesce_writes is used.
         """
 
         if name is None:
             name = f"reader={reader!r}, writer={writer!r}"
+        if buffered_reads is None:
+            buffered_reads = self.buffered_reads
+        if coalesce_writes is None:
+            coalesce_writes = self.coalesce_writes
 
         self.name = name
         self._reader = reader
@@ -133,14 +182,51 @@ class JsonIOStream(object):
         self._cleanup = cleanup
         self._closed = False
 
+        # Unconsumed data in the read buffer is in self._read_buffer[start:end].
+        self._read_buffer = None
+        self._read_buffer_view = None
+        self._read_buffer_start = 0
+        self._read_buffer_end = 0
+        self._readinto = None
+        if buffered_reads:
+            self._read_buffer = bytearray(self.READ_BUFFER_SIZE)
+            self._read_buffer_view = memoryview(self._read_buffer)
+            self._readinto = getattr(reader, "readinto1", None) or reader.readinto
+
+        # Enqueued [header, body, header, body, ...] when coalescing writes.
+        self._coalesce_writes = coalesce_writes
+        self._write_queue = []
+        self._write_queue_size = 0
+        self._write_queue_changed = threading.Condition()
+        self._write_error = None
+        self._flush_lock = threading.Lock()
+        self._flush_thread = None
+        self._writev = None
+        if coalesce_writes and hasattr(os, "writev"):
+            try:
+                fd = writer.fileno()
+            except Exception:
+                pass
+            else:
+                writer.flush()
+                self._writev = functools.partial(os.writev, fd)
+
     def close(self):
         """Closes the stream, the reader, and the writer."""
 
-        if self._closed:
-            return
-        self._closed = True
+        with self._write_queue_changed:
+            if self._closed:
+                return
+            self._closed = True
+            self._write_queue_changed.notify_all()
 
         log.debug("Closing {0} message stream", self.name)
+        if self._coalesce_writes:
+            try:
+                self.flush()
+            except JsonIOError:
+                pass
+
         try:
             try:
                 # Close the writer first, so that the other end of the connection has
@@ -182,6 +268,9 @@ class JsonIOStream(object):
         """
 
         decoder = decoder if decoder is not None else self.json_decoder_factory()
+        if self._read_buffer is not None:
+            return self._read_json_buffered(decoder)
+
         reader = self._reader
         read_line = functools.partial(self._read_line, reader)
 
@@ -265,10 +354,134 @@ class JsonIOStream(object):
         self._log_message("-->", body)
         return body
 
+    def _fill_read_buffer(self, size):
+        """Reads from reader until there are at least size unconsumed bytes in the
+        read buffer, moving the unconsumed data to the front of the buffer or growing
+        the buffer if there's not enough room after it.
+        """
+
+        while self._read_buffer_end - self._read_buffer_start < size:
+            buf = self._read_buffer
+            start = self._read_buffer_start
+            end = self._read_buffer_end
+            if start + size > len(buf):
+                if size > len(buf):
+                    new_buf = bytearray(max(size, len(buf) * 2))
+                    new_buf[: end - start] = self._read_buffer_view[start:end]
+                    self._read_buffer = new_buf
+                    self._read_buffer_view = memoryview(new_buf)
+                else:
+                    buf[: end - start] = buf[start:end]
+                self._read_buffer_start = 0
+                self._read_buffer_end = end - start
+
+            try:
+                n = self._readinto(self._read_buffer_view[self._read_buffer_end :])
+                if not n:
+                    raise EOFError
+            except Exception as exc:
+                raise NoMoreMessages(str(exc), stream=self)
+            self._read_buffer_end += n
+
+    def _read_json_buffered(self, decoder):
+        """Like read_json(), but using the read buffer."""
+
+        def log_message_and_reraise_exception(format_string="", *args, **kwargs):
+            if format_string:
+                format_string += "\n\n"
+            format_string += "{name} -->\n{raw_lines}"
+
+            if raw_end is None:
+                raw_data = self._read_buffer[
+                    self._read_buffer_start : self._read_buffer_end
+                ]
+            else:
+                raw_data = self._read_buffer[self._read_buffer_start : raw_end]
+            raw_lines = "\n".join(repr(line) for line in raw_data.split(b"\n"))
+
+            log.reraise_exception(
+                format_string, *args, name=self.name, raw_lines=raw_lines, **kwargs
+            )
+
+        # Headers are terminated by an empty line; if there are no headers at all,
+        # that is the very first line.
+        raw_end = None
+        scanned = 0
+        while True:
+            start = self._read_buffer_start
+            end = self._read_buffer_end
+            if self._read_buffer.startswith(b"\r\n", start, end):
+                headers_end = start
+                break
+            headers_end = self._read_buffer.find(
+                b"\r\n\r\n", start + max(scanned - 3, 0), end
+            )
+            if headers_end >= 0:
+                headers_end += 2
+                break
+            scanned = end - start
+            try:
+                self._fill_read_buffer(scanned + 1)
+            except Exception:
+                # Only log it if we have already read some data - see read_json().
+                if scanned:
+                    log_message_and_reraise_exception(
+                        "Error while reading message headers:"
+                    )
+                else:
+                    raise
+
+        headers = {}
+        header_lines = bytes(self._read_buffer_view[start:headers_end]).split(b"\r\n")
+        for line in header_lines[:-1]:
+            key, _, value = line.partition(b":")
+            headers[key] = value
+        headers_size = headers_end + 2 - start
+
+        try:
+            length = int(headers[b"Content-Length"])
+            if not (0 <= length <= self.MAX_BODY_SIZE):
+                raise ValueError
+        except (KeyError, ValueError):
+            try:
+                raise IOError("Content-Length is missing or invalid:")
+            except Exception:
+                log_message_and_reraise_exception()
+
+        # This may move the data in the buffer, so the offsets must be recomputed.
+        # Not logged due to https://github.com/microsoft/ptvsd/issues/1699
+        self._fill_read_buffer(headers_size + length)
+        raw_end = self._read_buffer_start + headers_size + length
+        body_start = self._read_buffer_start + headers_size
+        body_end = body_start + length
+
+        try:
+            try:
+                body = str(self._read_buffer_view[body_start:body_end], "utf-8")
+            except Exception:
+                log_message_and_reraise_exception()
+
+            try:
+                body = decoder.decode(body)
+            except Exception:
+                log_message_and_reraise_exception()
+        finally:
+            # Consume the message even if it couldn't be parsed.
+            if body_end == self._read_buffer_end:
+                # Nothing left in the buffer, so the next read can start at the front.
+                self._read_buffer_start = self._read_buffer_end = 0
+            else:
+                self._read_buffer_start = body_end
+
+        # If parsed successfully, log as JSON for readability.
+        self._log_message("-->", body)
+        return body
+
     def write_json(self, value, encoder=None):
         """Write a single JSON value into writer.
 
-        Value is written as encoded by encoder.encode().
+        Value is written as encoded by encoder.encode(), which can return either str,
+        or bytes that are already UTF-8 encoded.
         """
 
         if self._closed:
@@ -287,9 +500,15 @@ class JsonIOStream(object):
             body = encoder.encode(value)
         except Exception:
             self._log_message("<--", repr(value), logger=log.reraise_exception)
-        body = body.encode("utf-8")
+        if isinstance(body, str):
+            body = body.encode("utf-8")
 
         header = f"Content-Length: {len(body)}\r\n\r\n".encode("ascii")
+        if self._coalesce_writes:
+            self._enqueue_write(header, body)
+            self._log_message("<--", value)
+            return
+
         data = header + body
         data_written = 0
         try:
@@ -303,6 +522,101 @@ class JsonIOStream(object):
 
         self._log_message("<--", value)
 
+    def _enqueue_write(self, header, body):
+        with self._write_queue_changed:
+            if self._closed:
+                raise NoMoreMessages(stream=self)
+            if self._write_error is not None:
+                raise JsonIOError(stream=self, cause=self._write_error)
+
+            self._write_queue += [header, body]
+            self._write_queue_size += len(header) + len(body)
+            pending = self._write_queue_size
+
+            if self._flush_thread is None:
+                self._flush_thread = threading.Thread(
+                    target=self._flush_periodically, name=f"{self} writer"
+                )
+                hide_thread_from_debugger(self._flush_thread)
+                self._flush_thread.daemon = True
+                self._flush_thread.start()
+            self._write_queue_changed.notify_all()
+
+        if pending >= self.WRITE_COALESCE_SIZE:
+            self.flush()
+
+    def _flush_periodically(self):
+        while True:
+            with self._write_queue_changed:
+                while not self._write_queue_size and not self._closed:
+                    self._write_queue_changed.wait()
+                if self._closed:
+                    # close() flushes whatever is still pending.
+                    return
+
+            # Give other messages a chance to get enqueued before writing.
+            time.sleep(self.WRITE_COALESCE_DELAY)
+            try:
+                self.flush()
+            except JsonIOError:
+                # It will be reported by the next write_json().
+                return
+
+    def flush(self):
+        """Writes all messages that were enqueued by write_json() when coalescing
+        writes, in the order in which they were enqueued.
+
+        Raises JsonIOError if they couldn't be written; all subsequent calls to
+        write_json() will also raise it.
+        """
+
+        # Hold the lock for the duration of the write, so that batches that are
+        # flushed concurrently from different threads are written in order.
+        with self._flush_lock:
+            with self._write_queue_changed:
+                if self._write_error is not None:
+                    raise JsonIOError(stream=self, cause=self._write_error)
+                frames = self._write_queue
+                self._write_queue = []
+                self._write_queue_size = 0
+
+            if not frames:
+                return
+            try:
+                self._write_frames(frames)
+            except Exception as exc:
+                log.swallow_exception(
+                    "Error writing {0} enqueued message(s) to {1}:",
+                    len(frames) // 2,
+                    self.name,
+                    level="info",
+                )
+                with self._write_queue_changed:
+                    self._write_error = exc
+                raise JsonIOError(stream=self, cause=exc)
+
+    def _write_frames(self, frames):
+        writev = self._writev
+        if writev is None:
+            data = b"".join(frames)
+            data_written = 0
+            while data_written < len(data):
+                data_written += self._writer.write(data[data_written:])
+            self._writer.flush()
+            return
+
+        frames = [memoryview(frame) for frame in frames]
+        i = 0
+        while i < len(frames):
+            written = writev(frames[i : i + self._IOV_MAX])
+            # Skip the frames that were written in full, and trim the one that was
+            # written partially, if any.
+            while i < len(frames) and written >= len(frames[i]):
+                written -= len(frames[i])
+                i += 1
+            if written:
+                frames[i] = frames[i][written:]
+
     def __repr__(self):
         return f"{type(self).__name__}({self.name!r})"
 
@@ -407,6 +721,100 @@ class MessageDict(collections.OrderedDict):
     del _invalid_if_no_key
 
 
+class _LazyMessageDict(MessageDict):
+    """A MessageDict for an incoming message that was decoded without object_hook,
+    such that all nested JSON objects are plain dicts.
+
+    Nested dicts - including those in lists - are converted to _LazyMessageDict when
+    they are first retrieved via __getitem__(), get(), pop(), items(), or values(),
+    and are replaced in place, so that subsequent retrievals return the same object.
+    Thus, only those parts of the payload that are actually used get converted.
+
+    All instances converted from the same message share the same MessageDict.message.
+    """
+
+    class _Owner(object):
+        __slots__ = ["message", "unassociated"]
+
+        def __init__(self):
+            self.message = None
+            self.unassociated = []
+
+    def __init__(self, owner, items):
+        self._owner = owner
+        collections.OrderedDict.__init__(self, items)
+        if owner.unassociated is not None:
+            # Not associated with a message yet - see
+            # JsonMessageChannel._parse_incoming_message.
+            self.associate_with = self._associate_with
+            owner.unassociated.append(self)
+
+    @classmethod
+    def from_json(cls, value, key_order=()):
+        """Wraps a plain dict in a new _LazyMessageDict, moving the specified keys
+        to the end in that order.
+        """
+        result = cls(cls._Owner(), value)
+        for key in key_order:
+            if key in result:
+                result.move_to_end(key)
+        return result
+
+    @property
+    def message(self):
+        return self._owner.message
+
+    @message.setter
+    def message(self, value):
+        self._owner.message = value
+
+    def _associate_with(self, message):
+        owner = self._owner
+        owner.message = message
+        for d in owner.unassociated:
+            del d.associate_with
+        owner.unassociated = None
+
+    def _wrap(self, value):
+        if type(value) is dict:
+            return _LazyMessageDict(self._owner, value)
+        if type(value) is list:
+            for i, item in enumerate(value):
+                if type(item) in (dict, list):
+                    value[i] = self._wrap(item)
+        return value
+
+    def _materialize(self, key, value):
+        if type(value) is dict:
+            value = self._wrap(value)
+            collections.OrderedDict.__setitem__(self, key, value)
+        elif type(value) is list:
+            self._wrap(value)
+        return value
+
+    def __getitem__(self, key):
+        return self._materialize(key, super().__getitem__(key))
+
+    def get(self, key, default=None):
+        try:
+            value = collections.OrderedDict.__getitem__(self, key)
+        except KeyError:
+            return default
+        return self._materialize(key, value)
+
+    def pop(self, key, *args):
+        return self._wrap(super().pop(key, *args))
+
+    def items(self):
+        for key, value in list(collections.OrderedDict.items(self)):
+            self._materialize(key, value)
+        return super().items()
+
+    def values(self):
+        self.items()
+        return super().values()
+
+
 def _payload(value):
     """JSON validator for message payload.
 
@@ -1189,11 +1597,8 @@ class JsonMessageChannel(object):
     def _prettify(self, message_dict):
         """Reorders items in a MessageDict such that it is more readable."""
         for key in self._prettify_order:
-            if key not in message_dict:
-                continue
-            value = message_dict[key]
-            del message_dict[key]
-            message_dict[key] = value
+            if key in message_dict:
+                message_dict.move_to_end(key)
 
     @contextlib.contextmanager
     def _send_message(self, message):
@@ -1359,8 +1764,18 @@ class JsonMessageChannel(object):
                 del d.associate_with
 
         message_dicts = []
-        decoder = self.stream.json_decoder_factory(object_hook=object_hook)
-        message_dict = self.stream.read_json(decoder)
+        decoder_factory = self.stream.json_decoder_factory
+        if getattr(decoder_factory, "supports_object_hook", True):
+            decoder = decoder_factory(object_hook=object_hook)
+            message_dict = self.stream.read_json(decoder)
+        else:
+            # All objects are decoded as plain dicts, so the top-level one must be
+            # wrapped explicitly; it will then wrap nested dicts as they're accessed.
+            message_dict = self.stream.read_json(decoder_factory())
+            if isinstance(message_dict, dict):
+                message_dict = _LazyMessageDict.from_json(
+                    message_dict, self._prettify_order
+                )
         assert isinstance(message_dict, MessageDict)  # make sure stream used decoder
 
         msg_type = message_dict("type", json.enum("event", "request", "response"))
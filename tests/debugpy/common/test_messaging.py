@@ -8,6 +8,7 @@
 import collections
 import functools
 import io
+import os
 import pytest
 import random
 import re
@@ -92,6 +93,39 @@ class TestJsonIOStream(object):
             stream.read_json()
         assert exc_info.value.stream is stream
 
+    def test_read_buffered(self):
+        data = io.BytesIO(self.SERIALIZED_MESSAGES)
+        stream = messaging.JsonIOStream(data, data, "data", buffered_reads=True)
+        for expected_message in self.MESSAGES:
+            message = stream.read_json()
+            assert message == expected_message
+        with pytest.raises(messaging.NoMoreMessages) as exc_info:
+            stream.read_json()
+        assert exc_info.value.stream is stream
+
+    def test_read_buffered_fragmented(self):
+        class TrickleReader(object):
+            """Returns at most one byte per readinto() call."""
+
+            def __init__(self, data):
+                self.data = io.BytesIO(data)
+
+            def readinto(self, buf):
+                return self.data.readinto(buf[:1])
+
+        big_body = json.dumps({"seq": 42, "output": "x" * 0x30000}).encode("utf-8")
+        big_header = b"Content-Length: %d\r\n\r\n" % len(big_body)
+        data = self.SERIALIZED_MESSAGES + big_header + big_body
+        data += self.SERIALIZED_MESSAGES
+
+        for reader in io.BytesIO(data), TrickleReader(data):
+            stream = messaging.JsonIOStream(reader, None, "data", buffered_reads=True)
+            stream.READ_BUFFER_SIZE = 16
+            messages = [stream.read_json() for _ in range(2 * len(self.MESSAGES) + 1)]
+            assert messages == self.MESSAGES + [json.loads(big_body)] + self.MESSAGES
+            with pytest.raises(messaging.NoMoreMessages):
+                stream.read_json()
+
     def test_write(self):
         data = io.BytesIO()
         stream = messaging.JsonIOStream(data, data, "data")
@@ -100,6 +134,92 @@ class TestJsonIOStream(object):
         data = data.getvalue()
         assert data == self.SERIALIZED_MESSAGES
 
+    def test_write_coalesced(self):
+        data = io.BytesIO()
+        stream = messaging.JsonIOStream(data, data, "data", coalesce_writes=True)
+        stream.WRITE_COALESCE_DELAY = 60
+        for message in self.MESSAGES:
+            stream.write_json(message)
+        assert data.getvalue() == b""
+
+        stream.flush()
+        assert data.getvalue() == self.SERIALIZED_MESSAGES
+
+    def test_write_coalesced_vectored(self):
+        read_fd, write_fd = os.pipe()
+        with io.open(read_fd, "rb") as reader, io.open(write_fd, "wb") as writer:
+            stream = messaging.JsonIOStream(
+                reader, writer, "pipe", coalesce_writes=True
+            )
+            stream.WRITE_COALESCE_SIZE = len(self.SERIALIZED_MESSAGES) // 2
+            messages = [dict(message) for message in self.MESSAGES * 100]
+
+            def write_messages(seqs):
+                for seq in seqs:
+                    messages[seq]["seq"] = seq
+                    stream.write_json(messages[seq])
+
+            # Concurrent writers must not interleave parts of messages.
+            writers = [
+                threading.Thread(target=write_messages, args=[range(i, 300, 3)])
+                for i in range(3)
+            ]
+            for t in writers:
+                t.start()
+            for t in writers:
+                t.join()
+
+            assert sorted(
+                stream.read_json()["seq"] for _ in range(len(messages))
+            ) == list(range(len(messages)))
+
+            stream.close()
+            with pytest.raises(messaging.NoMoreMessages):
+                stream.write_json(self.MESSAGES[0])
+
+    def test_write_coalesced_error(self):
+        class BrokenWriter(object):
+            def write(self, data):
+                raise OSError("broken")
+
+        stream = messaging.JsonIOStream(
+            None, BrokenWriter(), "broken", coalesce_writes=True
+        )
+        stream.write_json(self.MESSAGES[0])
+        with pytest.raises(messaging.JsonIOError) as exc_info:
+            stream.flush()
+        assert exc_info.value.stream is stream
+        assert isinstance(exc_info.value.cause, OSError)
+
+        with pytest.raises(messaging.JsonIOError):
+            stream.write_json(self.MESSAGES[1])
+
+    @pytest.mark.parametrize("buffered_reads", [False, True])
+    @pytest.mark.parametrize("payload_size", [1024, 1024 * 1024])
+    def test_read_throughput(self, payload_size, buffered_reads):
+        message = {"seq": 1, "type": "event", "event": "output"}
+        message["body"] = {"output": "x" * (payload_size - len(json.dumps(message)))}
+        body = json.dumps(message).encode("utf-8")
+        frame = b"Content-Length: %d\r\n\r\n" % len(body) + body
+        count = max(10, 0x4000000 // (payload_size * 16))
+        data = io.BytesIO(frame * count)
+        stream = messaging.JsonIOStream(
+            data, data, "data", buffered_reads=buffered_reads
+        )
+
+        start = time.perf_counter()
+        for _ in range(count):
+            stream.read_json()
+        elapsed = time.perf_counter() - start
+
+        log.info(
+            "Read {0} messages of {1} bytes (buffered_reads={2}): {3:.0f} messages/sec",
+            count,
+            len(frame),
+            buffered_reads,
+            count / elapsed,
+        )
+
 
 class TestJsonMemoryStream(object):
     MESSAGES = [
@@ -181,7 +301,10 @@ class TestJsonMessageChannel(object):
 
         return iterate(), exhausted
 
-    def test_events(self):
+    @pytest.mark.parametrize(
+        "json_decoder_factory", [json.JsonDecoder, json.FastJsonDecoder]
+    )
+    def test_events(self, json_decoder_factory):
         EVENTS = [
             {
                 "seq": 1,
@@ -209,13 +332,17 @@ class TestJsonMessageChannel(object):
                 assert event.event == "unknown"
 
         stream = JsonMemoryStream(EVENTS, [])
+        stream.json_decoder_factory = json_decoder_factory
         channel = messaging.JsonMessageChannel(stream, Handlers())
         channel.start()
         channel.wait()
 
         recorder.expect(channel, EVENTS, ["stopped_event", "event"])
 
-    def test_requests(self):
+    @pytest.mark.parametrize(
+        "json_decoder_factory", [json.JsonDecoder, json.FastJsonDecoder]
+    )
+    def test_requests(self, json_decoder_factory):
         REQUESTS = [
             {
                 "seq": 1,
@@ -268,6 +395,7 @@ class TestJsonMessageChannel(object):
                 raise request.cant_handle("pause error")
 
         stream = JsonMemoryStream(REQUESTS, [])
+        stream.json_decoder_factory = json_decoder_factory
         channel = messaging.JsonMessageChannel(stream, Handlers())
         channel.start()
         channel.wait()
@@ -437,7 +565,10 @@ class TestJsonMessageChannel(object):
         assert response4 is request4.response
         assert isinstance(response4.body, messaging.NoMoreMessages)
 
-    def test_invalid_request_handling(self):
+    @pytest.mark.parametrize(
+        "json_decoder_factory", [json.JsonDecoder, json.FastJsonDecoder]
+    )
+    def test_invalid_request_handling(self, json_decoder_factory):
         REQUESTS = [
             {
                 "seq": 1,
@@ -463,6 +594,7 @@ class TestJsonMessageChannel(object):
 
         output = []
         stream = JsonMemoryStream(REQUESTS, output)
+        stream.json_decoder_factory = json_decoder_factory
         channel = messaging.JsonMessageChannel(stream, Handlers())
         channel.start()
         channel.wait()
@@ -505,6 +637,145 @@ class TestJsonMessageChannel(object):
             },
         ]
 
+    def test_lazy_payload(self):
+        REQUESTS = [
+            {
+                "seq": 1,
+                "type": "request",
+                "command": "setBreakpoints",
+                "arguments": {
+                    "source": {"path": "main.py"},
+                    "breakpoints": [{"line": 1}, {"line": 2, "condition": "x"}],
+                },
+            }
+        ]
+
+        class Handlers(object):
+            def setBreakpoints_request(self, request):
+                arguments = request.arguments
+                assert isinstance(arguments, messaging.MessageDict)
+                assert arguments.message is request
+                assert not hasattr(arguments, "associate_with")
+
+                source = arguments["source"]
+                assert isinstance(source, messaging.MessageDict)
+                assert source.message is request
+                assert arguments["source"] is source
+
+                breakpoints = request("breakpoints", json.array(dict))
+                assert all(
+                    isinstance(bp, messaging.MessageDict) and bp.message is request
+                    for bp in breakpoints
+                )
+                return {"verified": [bp("line", int) for bp in breakpoints]}
+
+        output = []
+        stream = JsonMemoryStream(REQUESTS, output)
+        stream.json_decoder_factory = json.FastJsonDecoder
+        channel = messaging.JsonMessageChannel(stream, Handlers())
+        channel.start()
+        channel.wait()
+
+        assert output == [
+            {
+                "seq": 1,
+                "type": "response",
+                "request_seq": 1,
+                "command": "setBreakpoints",
+                "success": True,
+                "body": {"verified": [1, 2]},
+            }
+        ]
+
+    @pytest.mark.parametrize(
+        "json_decoder_factory", [json.JsonDecoder, json.FastJsonDecoder]
+    )
+    def test_parse_throughput(self, json_decoder_factory):
+        # Representative DAP traffic when stepping through a program that has deep
+        # call stacks and large local scopes, and prints to stdout.
+        traffic = [
+            {
+                "seq": 1,
+                "type": "response",
+                "request_seq": 1,
+                "command": "stackTrace",
+                "success": True,
+                "body": {
+                    "stackFrames": [
+                        {
+                            "id": i,
+                            "name": f"func{i}",
+                            "line": i,
+                            "column": 1,
+                            "source": {"path": f"/src/module{i}.py", "sourceReference": 0},
+                        }
+                        for i in range(100)
+                    ],
+                    "totalFrames": 100,
+                },
+            },
+            {
+                "seq": 2,
+                "type": "response",
+                "request_seq": 2,
+                "command": "variables",
+                "success": True,
+                "body": {
+                    "variables": [
+                        {
+                            "name": f"var{i}",
+                            "value": repr(list(range(10))),
+                            "type": "list",
+                            "evaluateName": f"var{i}",
+                            "variablesReference": i,
+                            "presentationHint": {"attributes": ["rawString"]},
+                        }
+                        for i in range(1000)
+                    ]
+                },
+            },
+        ]
+        traffic += [
+            {
+                "seq": 3 + i,
+                "type": "event",
+                "event": "output",
+                "body": {"category": "stdout", "output": f"line {i}\n"},
+            }
+            for i in range(100)
+        ]
+
+        class Handlers(object):
+            def event(self, event):
+                event("output", str)
+
+        repeat = 20
+        stream = JsonMemoryStream(traffic * repeat, [])
+        stream.json_decoder_factory = json_decoder_factory
+        stream._log_message = lambda dir, data: None
+        channel = messaging.JsonMessageChannel(stream, Handlers())
+        for request_seq in (1, 2):
+            channel._sent_requests[request_seq] = messaging.OutgoingRequest(
+                channel, request_seq, "", {}
+            )
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for message in traffic:
+                if message["type"] == "response":
+                    channel._sent_requests[message["request_seq"]] = (
+                        messaging.OutgoingRequest(channel, message["request_seq"], "", {})
+                    )
+                channel._parse_incoming_message()
+        elapsed = time.perf_counter() - start
+
+        log.info(
+            "Parsed {0} messages with {1}: {2:.0f} messages/sec",
+            len(traffic) * repeat,
+            json_decoder_factory.__name__,
+            len(traffic) * repeat / elapsed,
+        )
+
     def test_fuzz(self):
         # Set up two channels over the same stream that send messages to each other
         # asynchronously, and record everything that they send and receive.